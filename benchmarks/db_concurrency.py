@@ -0,0 +1,75 @@
+"""Benchmark: read throughput per reader-pool size, with the writer idle and busy.
+
+Run with `python benchmarks/db_concurrency.py`. Uses a throwaway database file.
+Reads can only scale up to the number of CPU cores, which is printed first.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import DatabaseManager
+
+ROWS = 20000
+READ_TASKS = 16
+DURATION = 2.0
+
+# deliberately unindexed so each read does real work off the event loop
+READ_SQL = "SELECT COUNT(*), MAX(role_id) FROM reaction_roles WHERE guild_id = ?"
+
+
+async def writer(db, stop):
+    writes = 0
+    while not stop.is_set():
+        await db.set_repeat_mode(writes % 500, "all" if writes % 2 else "none")
+        writes += 1
+    return writes
+
+
+async def reader(db, stop):
+    reads = 0
+    while not stop.is_set():
+        await db.fetchone(READ_SQL, (reads % 50,))
+        reads += 1
+    return reads
+
+
+async def run(path, readers, busy):
+    db = DatabaseManager(path, readers=readers)
+    await db.connect()
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(reader(db, stop)) for _ in range(READ_TASKS)]
+    write_task = asyncio.create_task(writer(db, stop)) if busy else None
+    await asyncio.sleep(DURATION)
+    stop.set()
+    reads = sum(await asyncio.gather(*tasks))
+    writes = await write_task if write_task else 0
+    await db.close()
+    return reads / DURATION, writes / DURATION
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        db = DatabaseManager(path, readers=0)
+        await db.connect()
+        async with db.transaction() as conn:
+            await conn.executemany(
+                "INSERT INTO reaction_roles (message_id, emoji, guild_id, role_id) VALUES (?, ?, ?, ?)",
+                [(i, "🎉", i % 50, i) for i in range(ROWS)]
+            )
+        await db.close()
+
+        print(f"CPU cores: {os.cpu_count()}")
+        print(f"{'readers':>7} | {'reads/s idle':>12} | {'reads/s busy':>12} | {'writes/s busy':>13}")
+        for readers in (1, 2, 4, 8):
+            idle, _ = await run(path, readers, busy=False)
+            busy, writes = await run(path, readers, busy=True)
+            print(f"{readers:>7} | {idle:>12.0f} | {busy:>12.0f} | {writes:>13.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
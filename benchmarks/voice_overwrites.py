@@ -0,0 +1,80 @@
+"""Offline benchmark: REST calls for rapid lock/unlock toggling, with and without coalescing.
+
+Run with `python benchmarks/voice_overwrites.py`. No Discord connection is needed.
+"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.voice_overwrites import OverwriteCoalescer
+
+
+class FakeOverwrite:
+    def __init__(self, **perms):
+        self.connect = perms.get("connect")
+        self.manage_channels = perms.get("manage_channels")
+        self.move_members = perms.get("move_members")
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.overwrites = {}
+        self.calls = 0
+
+    def overwrites_for(self, target):
+        current = self.overwrites.get(target)
+        return FakeOverwrite(**vars(current)) if current else FakeOverwrite()
+
+    async def set_permissions(self, target, *, overwrite):
+        self.calls += 1
+        self.overwrites[target] = overwrite
+
+
+async def direct(channels, events):
+    for cid, connect in events:
+        ch = channels[cid]
+        overwrite = ch.overwrites_for("@everyone")
+        overwrite.connect = connect
+        await ch.set_permissions("@everyone", overwrite=overwrite)
+        await asyncio.sleep(0)
+
+
+async def coalesced(channels, events, window):
+    coalescer = OverwriteCoalescer(delay=window)
+    for cid, connect in events:
+        coalescer.queue(channels[cid], "@everyone", connect=connect)
+        await asyncio.sleep(0.001)
+    await coalescer.flush_all()
+    return coalescer
+
+
+async def main():
+    rng = random.Random(0)
+    events = [(rng.randrange(20), rng.random() < 0.5) for _ in range(2000)]
+    final = {}
+    for cid, connect in events:
+        final[cid] = connect
+
+    baseline = {cid: FakeChannel(cid) for cid in range(20)}
+    await direct(baseline, events)
+    base_calls = sum(ch.calls for ch in baseline.values())
+    print(f"direct set_permissions: {base_calls} REST calls")
+
+    for window in (0.05, 0.25, 0.5):
+        channels = {cid: FakeChannel(cid) for cid in range(20)}
+        coalescer = await coalesced(channels, events, window)
+        calls = sum(ch.calls for ch in channels.values())
+        assert calls == coalescer.requests_sent
+        assert all(channels[cid].overwrites["@everyone"].connect == final[cid] for cid in final)
+        print(
+            f"coalesced ({window * 1000:.0f} ms window): {calls} REST calls, {base_calls - calls} saved, "
+            f"{coalescer.changes_dropped} no-op changes dropped"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,6 +16,14 @@ class MyBot(commands.Bot):
 
     async def setup_hook(self):
         print("🛠️ Running setup_hook...")
+        # db must load first; cogs use the bot.db handle it sets, so without
+        # it startup stops here instead of loading cogs that cannot work
+        try:
+            await self.load_extension("db")
+            print("✅ Loaded database")
+        except Exception as e:
+            print(f"❌ Failed to load database: {e}")
+            raise
         for filename in os.listdir("cogs"):
             if filename.endswith(".py") and not filename.startswith("__"):
                 try:
@@ -3,12 +3,59 @@ from discord import app_commands
 from discord.ext import commands
 import asyncio
 import random
+import time
 from typing import Literal, Optional
 
 class Giveaway(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.active_giveaways: dict[int, dict] = {}
+        self.restore_task: Optional[asyncio.Task] = None
+        # message id -> task sleeping until that giveaway ends
+        self.end_tasks: dict[int, asyncio.Task] = {}
+
+    async def cog_load(self):
+        self.restore_task = asyncio.create_task(self.restore_giveaways())
+
+    async def cog_unload(self):
+        if self.restore_task:
+            self.restore_task.cancel()
+        # the reloaded cog restores these from the database
+        for task in self.end_tasks.values():
+            task.cancel()
+        self.end_tasks.clear()
+
+    async def restore_giveaways(self):
+        """Resume giveaways that were still running when the bot last stopped."""
+        await self.bot.wait_until_ready()
+        for message_id, channel_id, prize, winners, role_id, ends_at in await self.bot.db.get_giveaways():
+            if message_id in self.end_tasks:
+                continue
+            try:
+                channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+                msg = await channel.fetch_message(message_id)
+            except (discord.NotFound, discord.Forbidden):
+                await self.bot.db.remove_giveaway(message_id)
+                continue
+            except discord.HTTPException as e:
+                print(f"Failed to restore giveaway {message_id}: {e}")
+                continue
+            self.active_giveaways[message_id] = {
+                "msg": msg,
+                "winners": winners,
+                "role": msg.guild.get_role(role_id) if role_id else None,
+                "prize": prize
+            }
+            self.schedule_end(message_id, ends_at)
+
+    def schedule_end(self, message_id: int, ends_at: float):
+        self.end_tasks[message_id] = asyncio.create_task(self.end_giveaway_at(message_id, ends_at))
+
+    async def end_giveaway_at(self, message_id: int, ends_at: float):
+        await asyncio.sleep(max(0, ends_at - time.time()))
+        # past this point the giveaway always finishes, even if the cog unloads
+        self.end_tasks.pop(message_id, None)
+        await self.end_giveaway(message_id)
 
     @app_commands.command(
         name="giveaway",
@@ -55,17 +102,21 @@ class Giveaway(commands.Cog):
             "role": required_role,
             "prize": prize
         }
+        ends_at = time.time() + total
+        await self.bot.db.add_giveaway(
+            msg.id, msg.channel.id, interaction.guild.id, prize, winners,
+            required_role.id if required_role else None, ends_at
+        )
+        self.schedule_end(msg.id, ends_at)
         await interaction.response.send_message(
             f"✅ Giveaway started for **{prize}**!", ephemeral=True
         )
 
-        await asyncio.sleep(total)
-        await self.end_giveaway(msg.id)
-
     async def end_giveaway(self, message_id: int):
         data = self.active_giveaways.pop(message_id, None)
         if not data:
             return
+        await self.bot.db.remove_giveaway(message_id)
 
         msg = await data["msg"].channel.fetch_message(message_id)
         users = [
@@ -1,10 +1,11 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import yt_dlp, asyncio, spotipy, os
+import yt_dlp, asyncio, spotipy, os, re
 import wavelink
 from spotipy.oauth2 import SpotifyClientCredentials
 from utils.spotify import get_spotify_client
+from utils.audio_cache import AudioCache
 
 sp = get_spotify_client()
 
@@ -12,13 +13,14 @@ sp = get_spotify_client()
 class Music(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.repeat = False
-        self.last_url = None
         self.last_guild = None
+        # guild id -> last track requested, replayed on repeat
+        self.last_tracks: dict[int, wavelink.Track] = {}
+        self.audio_cache = AudioCache.from_env()
 
-   class Music(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
+    async def cog_unload(self):
+        if self.audio_cache:
+            self.audio_cache.close()
 
     async def ensure_voice(self, interaction: discord.Interaction):
         """Ensure bot connects to a voice channel if not already."""
@@ -45,17 +47,31 @@ class Music(commands.Cog):
         track = sp.track(link)
         return f"{track['name']} {track['artists'][0]['name']}"
 
-    def after_play(self, guild):
-        if self.repeat and self.last_url:
-            asyncio.run_coroutine_threadsafe(self._replay(guild), self.bot.loop)
+    async def play_track(self, vc: wavelink.Player, track: wavelink.Track):
+        """Play `track`, from the local audio cache when it holds a copy."""
+        self.last_tracks[vc.guild.id] = track
+        if self.audio_cache:
+            path = self.audio_cache.get(track.identifier)
+            if path:
+                # Lavalink's local source passes the cached Opus frames straight through
+                try:
+                    cached = await vc.node.get_tracks(wavelink.Track, path)
+                except Exception as e:
+                    print(f"Failed to load cached track {track.identifier}: {e}")
+                    cached = None
+                if cached:
+                    return await vc.play(cached[0])
+                self.audio_cache.discard(track.identifier)
+            self.audio_cache.record_play(track.identifier, lambda: self.extract_url(track.uri)[0])
+        await vc.play(track)
 
-    async def _replay(self, guild):
-        await asyncio.sleep(1)
-        vc = guild.voice_client
-        if vc and not vc.is_playing():
-            vc.play(discord.FFmpegPCMAudio(self.last_url, **FFMPEG_OPTS), after=lambda e: self.after_play(guild))
+    @commands.Cog.listener()
+    async def on_wavelink_track_end(self, player: wavelink.Player, track: wavelink.Track, reason):
+        last = self.last_tracks.get(player.guild.id)
+        if last and reason == "FINISHED" and await self.bot.db.get_repeat_mode(player.guild.id) != "none":
+            await self.play_track(player, last)
 
-      @app_commands.command(name="join", description="Bot joins your voice channel.")
+    @app_commands.command(name="join", description="Bot joins your voice channel.")
     async def join(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
         vc = await self.ensure_voice(interaction)
@@ -69,10 +85,11 @@ class Music(commands.Cog):
         if not vc:
             await interaction.followup.send("❌ I'm not connected to a voice channel.")
             return
+        self.last_tracks.pop(interaction.guild.id, None)
         await vc.disconnect()
         await interaction.followup.send("👋 Disconnected from the voice channel.")
 
-      @app_commands.command(name="youtube_play", description="Play a YouTube video by URL or search.")
+    @app_commands.command(name="youtube_play", description="Play a YouTube video by URL or search.")
     async def youtube_play(self, interaction: discord.Interaction, query: str):
         await interaction.response.defer()
         vc = await self.ensure_voice(interaction)
@@ -89,7 +106,7 @@ class Music(commands.Cog):
             return
 
         track = tracks[0]
-        await vc.play(track)
+        await self.play_track(vc, track)
         await interaction.followup.send(f"Now playing: **{track.title}**")
 
     @app_commands.command(name="spotify_play", description="Play a Spotify track by searching it on YouTube.")
@@ -107,7 +124,7 @@ class Music(commands.Cog):
             return
 
         track = tracks[0]
-        await vc.play(track)
+        await self.play_track(vc, track)
         await interaction.followup.send(f"Now playing (from Spotify): **{track.title}**")
 
 
@@ -137,8 +154,9 @@ class Music(commands.Cog):
 
     @app_commands.command(name="repeat", description="Toggle infinite repeat")
     async def repeat(self, interaction: discord.Interaction):
-        self.repeat = not self.repeat
-        await interaction.response.send_message(f"🔁 Repeat {'enabled' if self.repeat else 'disabled'}.")
+        enabled = await self.bot.db.get_repeat_mode(interaction.guild.id) == "none"
+        await self.bot.db.set_repeat_mode(interaction.guild.id, "all" if enabled else "none")
+        await interaction.response.send_message(f"🔁 Repeat {'enabled' if enabled else 'disabled'}.")
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Music(bot))
@@ -28,17 +28,21 @@ class ReactionRole(commands.Cog):
         msg = await channel.send(embed=embed)
         await msg.add_reaction(emoji)
 
-        def check(reaction, user):
-            return reaction.message.id == msg.id and str(reaction.emoji) == emoji
-
-        @self.bot.event
-        async def on_raw_reaction_add(payload):
-            if payload.message_id == msg.id and str(payload.emoji) == emoji:
-                guild = self.bot.get_guild(payload.guild_id)
-                member = guild.get_member(payload.user_id)
-                await member.add_roles(role)
-
+        await self.bot.db.add_reaction_role(msg.id, emoji, interaction.guild.id, role.id)
         await interaction.response.send_message("✅ Reaction role set up!", ephemeral=True)
 
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if not payload.guild_id or payload.user_id == self.bot.user.id:
+            return
+        role_id = await self.bot.db.get_reaction_role(payload.message_id, str(payload.emoji))
+        if not role_id:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        role = guild.get_role(role_id)
+        member = payload.member or guild.get_member(payload.user_id)
+        if role and member:
+            await member.add_roles(role)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(ReactionRole(bot))
@@ -20,6 +20,7 @@ class Ticket(commands.Cog):
                 interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True)
             }
         )
+        await self.bot.db.add_ticket(channel.id, guild.id, interaction.user.id)
         await interaction.response.send_message(
             f"🎫 Your ticket: {channel.mention}", ephemeral=True
         )
@@ -27,8 +28,10 @@ class Ticket(commands.Cog):
     @app_commands.command(name="closeticket", description="Close an existing ticket")
     async def closeticket(self, interaction: discord.Interaction):
         ch = interaction.channel
-        if isinstance(ch.category, discord.CategoryChannel) and ch.category.name == self.category_name:
+        in_category = isinstance(ch.category, discord.CategoryChannel) and ch.category.name == self.category_name
+        if in_category or await self.bot.db.is_ticket(ch.id):
             await ch.delete()
+            await self.bot.db.remove_ticket(ch.id)
         else:
             await interaction.response.send_message(
                 "❌ This is not a ticket channel.", ephemeral=True
@@ -1,40 +1,174 @@
+import asyncio
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
+from utils.constants import JOIN_TO_CREATE_NAME
+from utils.voice_overwrites import OverwriteCoalescer
 
 class Voice(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.overwrites = OverwriteCoalescer()
+        # channel id -> owner member id
+        self.owners: dict[int, int] = {}
+        # channel id -> ids of non-bot members currently connected
+        self.occupants: dict[int, set[int]] = {}
+        # ids of join-to-create channels, and those waiting to be deleted;
+        # also stored in bot.db so they are cleaned up after a reload or restart
+        self.temp_channels: set[int] = set()
+        self.empty_temp_channels: set[int] = set()
+        self.cleanup_temp_channels.start()
+
+    async def cog_unload(self):
+        self.cleanup_temp_channels.cancel()
+        await self.overwrites.flush_all()
+
+    def humans_in(self, ch: discord.VoiceChannel) -> set[int]:
+        if ch.id not in self.occupants:
+            self.occupants[ch.id] = {m.id for m in ch.members if not m.bot}
+        return self.occupants[ch.id]
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if before.channel == after.channel or member.bot:
+            return
+
+        if before.channel:
+            if before.channel.id in self.occupants:
+                self.occupants[before.channel.id].discard(member.id)
+                if not self.occupants[before.channel.id]:
+                    if before.channel.id in self.temp_channels:
+                        self.empty_temp_channels.add(before.channel.id)
+                    else:
+                        del self.occupants[before.channel.id]
+            # claimed ordinary channels go back to unowned when the owner leaves
+            if before.channel.id not in self.temp_channels and self.owners.get(before.channel.id) == member.id:
+                del self.owners[before.channel.id]
+                self.revoke_owner(before.channel, member)
+
+        if after.channel:
+            if after.channel.id in self.occupants:
+                self.occupants[after.channel.id].add(member.id)
+            self.empty_temp_channels.discard(after.channel.id)
+            if after.channel.name == JOIN_TO_CREATE_NAME:
+                await self.create_temp_channel(member, after.channel)
+
+    async def create_temp_channel(self, member: discord.Member, hub: discord.VoiceChannel):
+        try:
+            ch = await hub.guild.create_voice_channel(
+                f"{member.display_name}'s channel", category=hub.category,
+                overwrites={member: discord.PermissionOverwrite(manage_channels=True, move_members=True)}
+            )
+        except discord.HTTPException as e:
+            print(f"Failed to create temporary channel: {e}")
+            return
+        self.temp_channels.add(ch.id)
+        self.owners[ch.id] = member.id
+        self.occupants[ch.id] = set()
+        await self.bot.db.add_temp_channel(ch.id, hub.guild.id, member.id)
+        try:
+            await member.move_to(ch)
+        except discord.HTTPException:
+            # member left before the move; let the cleanup loop remove it
+            self.empty_temp_channels.add(ch.id)
+
+    def revoke_owner(self, ch: discord.VoiceChannel, member: discord.Member):
+        self.overwrites.queue(ch, member, manage_channels=None, move_members=None).add_done_callback(self.log_revoke)
+
+    @staticmethod
+    def log_revoke(future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            print(f"Failed to revoke channel owner: {future.exception()}")
+
+    @tasks.loop(seconds=30)
+    async def cleanup_temp_channels(self):
+        if not self.empty_temp_channels:
+            return
+        batch, self.empty_temp_channels = self.empty_temp_channels, set()
+        batch = [cid for cid in batch if not self.occupants.get(cid)]
+        channels = [self.bot.get_channel(cid) for cid in batch]
+        results = await asyncio.gather(
+            *(ch.delete(reason="Temporary voice channel empty") for ch in channels if ch),
+            return_exceptions=True
+        )
+        results = iter(results)
+        for cid, ch in zip(batch, channels):
+            result = next(results) if ch else None
+            if isinstance(result, discord.NotFound):
+                pass
+            elif isinstance(result, Exception):
+                print(f"Failed to delete temporary channel: {result}")
+                # retry on the next pass unless someone joined meanwhile
+                if not self.occupants.get(cid):
+                    self.empty_temp_channels.add(cid)
+                continue
+            self.temp_channels.discard(cid)
+            self.owners.pop(cid, None)
+            self.occupants.pop(cid, None)
+            self.overwrites.discard(cid)
+            await self.bot.db.remove_temp_channel(cid)
+
+    @cleanup_temp_channels.before_loop
+    async def before_cleanup(self):
+        await self.bot.wait_until_ready()
+        await self.restore_temp_channels()
+
+    async def restore_temp_channels(self):
+        """Pick up temporary channels created before the last reload or restart."""
+        for cid, owner_id in await self.bot.db.get_temp_channels():
+            ch = self.bot.get_channel(cid)
+            if not ch:
+                await self.bot.db.remove_temp_channel(cid)
+                continue
+            self.temp_channels.add(cid)
+            self.owners[cid] = owner_id
+            if not self.humans_in(ch):
+                self.empty_temp_channels.add(cid)
 
     @app_commands.command(name="voice_lock", description="Lock your voice channel")
     async def voice_lock(self, interaction: discord.Interaction):
         if not interaction.user.voice:
             return await interaction.response.send_message("❌ Join a VC first.", ephemeral=True)
         ch = interaction.user.voice.channel
-        overwrite = ch.overwrites_for(interaction.guild.default_role)
-        overwrite.connect = False
-        await ch.set_permissions(interaction.guild.default_role, overwrite=overwrite)
-        await interaction.response.send_message(f"🔒 Locked {ch.name}")
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await self.overwrites.queue(ch, interaction.guild.default_role, connect=False)
+        except discord.HTTPException as e:
+            return await interaction.followup.send(f"❌ Couldn't lock {ch.name}: {e.text or e}")
+        await interaction.followup.send(f"🔒 Locked {ch.name}")
 
     @app_commands.command(name="voice_unlock", description="Unlock your voice channel")
     async def voice_unlock(self, interaction: discord.Interaction):
         if not interaction.user.voice:
             return await interaction.response.send_message("❌ Join a VC first.", ephemeral=True)
         ch = interaction.user.voice.channel
-        overwrite = ch.overwrites_for(interaction.guild.default_role)
-        overwrite.connect = True
-        await ch.set_permissions(interaction.guild.default_role, overwrite=overwrite)
-        await interaction.response.send_message(f"🔓 Unlocked {ch.name}")
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await self.overwrites.queue(ch, interaction.guild.default_role, connect=True)
+        except discord.HTTPException as e:
+            return await interaction.followup.send(f"❌ Couldn't unlock {ch.name}: {e.text or e}")
+        await interaction.followup.send(f"🔓 Unlocked {ch.name}")
 
     @app_commands.command(name="voice_claim", description="Claim an empty voice channel")
     async def voice_claim(self, interaction: discord.Interaction):
         if not interaction.user.voice:
             return await interaction.response.send_message("❌ Join a VC first.", ephemeral=True)
         ch = interaction.user.voice.channel
-        members = [m for m in ch.members if not m.bot]
-        if len(members) == 1 and members[0] == interaction.user:
-            await ch.set_permissions(interaction.user, manage_channels=True, move_members=True)
-            await interaction.response.send_message(f"👑 You now control {ch.name}")
+        if self.owners.get(ch.id) == interaction.user.id:
+            return await interaction.response.send_message(f"👑 You already control {ch.name}", ephemeral=True)
+        if self.humans_in(ch) == {interaction.user.id}:
+            await interaction.response.defer(ephemeral=True)
+            previous = interaction.guild.get_member(self.owners.get(ch.id, 0))
+            try:
+                await self.overwrites.queue(ch, interaction.user, manage_channels=True, move_members=True)
+            except discord.HTTPException as e:
+                return await interaction.followup.send(f"❌ Couldn't claim {ch.name}: {e.text or e}")
+            self.owners[ch.id] = interaction.user.id
+            if ch.id in self.temp_channels:
+                await self.bot.db.add_temp_channel(ch.id, ch.guild.id, interaction.user.id)
+            if previous:
+                self.revoke_owner(ch, previous)
+            await interaction.followup.send(f"👑 You now control {ch.name}")
         else:
             await interaction.response.send_message("❌ Channel not empty or you’re not alone.", ephemeral=True)
 
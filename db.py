@@ -1,59 +1,178 @@
 import aiosqlite
+import asyncio
 import os
-from discord.ext import commands
+from contextlib import asynccontextmanager
+from urllib.parse import quote
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE = os.getenv("DATABASE_URL", "bot_data.db")
+READERS = int(os.getenv("DATABASE_READERS", "4"))
+# sqlite3 keeps this many prepared statements per connection, keyed by SQL text
+STATEMENT_CACHE = 256
+
+# Versioned schema, tracked with PRAGMA user_version. Append only.
+MIGRATIONS = [
+    (1, [
+        '''CREATE TABLE IF NOT EXISTS guild_data (
+            guild_id INTEGER PRIMARY KEY,
+            repeat_mode TEXT,
+            queue TEXT)''',
+    ]),
+    (2, [
+        '''CREATE TABLE IF NOT EXISTS giveaways (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            prize TEXT NOT NULL,
+            winners INTEGER NOT NULL,
+            role_id INTEGER,
+            ends_at REAL NOT NULL)''',
+        '''CREATE TABLE IF NOT EXISTS reaction_roles (
+            message_id INTEGER NOT NULL,
+            emoji TEXT NOT NULL,
+            guild_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            PRIMARY KEY (message_id, emoji))''',
+        '''CREATE TABLE IF NOT EXISTS tickets (
+            channel_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL)''',
+    ]),
+    (3, [
+        '''CREATE TABLE IF NOT EXISTS temp_voice_channels (
+            channel_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            owner_id INTEGER NOT NULL)''',
+    ]),
+]
 
 class DatabaseManager:
-    def __init__(self):
+    """Shared data-access service.
+
+    Writes go through one connection and are serialized by a lock. Reads are
+    spread over a small pool of read-only connections, which WAL mode lets
+    run alongside an in-flight write.
+    """
+
+    def __init__(self, path=DATABASE, readers=READERS):
+        self.path = path
+        self.readers = 0 if path == ":memory:" else readers
         self.db = None
+        self._write_lock = asyncio.Lock()
+        self._pool = asyncio.Queue()
+        self._reader_conns = []
 
     async def connect(self):
         try:
-            self.db = await aiosqlite.connect(DATABASE)
-            await self.db.execute('''CREATE TABLE IF NOT EXISTS guild_data (
-                                    guild_id INTEGER PRIMARY KEY,
-                                    repeat_mode TEXT,
-                                    queue TEXT)''')
-            await self.db.commit()
+            self.db = await aiosqlite.connect(self.path, cached_statements=STATEMENT_CACHE)
+            await self.db.execute("PRAGMA journal_mode=WAL")
+            await self.db.execute("PRAGMA synchronous=NORMAL")
+            await self.db.execute("PRAGMA busy_timeout=5000")
+            await self.migrate()
+            uri = f"file:{quote(os.path.abspath(self.path))}?mode=ro"
+            for _ in range(self.readers):
+                conn = await aiosqlite.connect(uri, uri=True, cached_statements=STATEMENT_CACHE)
+                await conn.execute("PRAGMA busy_timeout=5000")
+                self._reader_conns.append(conn)
+                self._pool.put_nowait(conn)
         except Exception as e:
             print(f"Error connecting to the database: {e}")
+            await self.close()
+            raise
 
     async def close(self):
-        if self.db:
+        for conn in [*self._reader_conns, self.db]:
+            if conn:
+                try:
+                    await conn.close()
+                except Exception as e:
+                    print(f"Error closing the database: {e}")
+        self._reader_conns = []
+        self._pool = asyncio.Queue()
+        self.db = None
+
+    async def migrate(self):
+        async with self.db.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        for target, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            async with self.transaction() as db:
+                for sql in statements:
+                    await db.execute(sql)
+                await db.execute(f"PRAGMA user_version = {target}")
+            print(f"Database migrated to version {target}")
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Hold the writer for several statements, committed together."""
+        async with self._write_lock:
+            # sqlite3 only opens a transaction implicitly before DML, so begin
+            # explicitly to keep DDL and PRAGMA user_version atomic too
+            await self.db.execute("BEGIN IMMEDIATE")
             try:
-                await self.db.close()
-            except Exception as e:
-                print(f"Error closing the database: {e}")
+                yield self.db
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+
+    @asynccontextmanager
+    async def reader(self):
+        if not self._reader_conns:
+            # no pool (e.g. an in-memory database); read through the writer,
+            # holding its lock so an open transaction's rows aren't visible
+            async with self._write_lock:
+                yield self.db
+            return
+        conn = await self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put_nowait(conn)
+
+    async def execute(self, sql, params=()):
+        async with self.transaction() as db:
+            await db.execute(sql, params)
+
+    async def fetchone(self, sql, params=()):
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, sql, params=()):
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
 
     async def get_repeat_mode(self, guild_id):
         try:
-            async with self.db.execute('SELECT repeat_mode FROM guild_data WHERE guild_id = ?', (guild_id,)) as cursor:
-                result = await cursor.fetchone()
-                if result:
-                    return result[0]
-                return 'none'
+            result = await self.fetchone('SELECT repeat_mode FROM guild_data WHERE guild_id = ?', (guild_id,))
+            if result and result[0]:
+                return result[0]
+            return 'none'
         except Exception as e:
             print(f"Error fetching repeat mode: {e}")
             return 'none'
 
     async def set_repeat_mode(self, guild_id, mode):
         try:
-            await self.db.execute('REPLACE INTO guild_data (guild_id, repeat_mode) VALUES (?, ?)', (guild_id, mode))
-            await self.db.commit()
+            await self.execute(
+                'INSERT INTO guild_data (guild_id, repeat_mode) VALUES (?, ?) '
+                'ON CONFLICT(guild_id) DO UPDATE SET repeat_mode = excluded.repeat_mode',
+                (guild_id, mode)
+            )
         except Exception as e:
             print(f"Error setting repeat mode: {e}")
 
     async def get_queue(self, guild_id):
         try:
-            async with self.db.execute('SELECT queue FROM guild_data WHERE guild_id = ?', (guild_id,)) as cursor:
-                result = await cursor.fetchone()
-                if result:
-                    return result[0].split(",")
-                return []
+            result = await self.fetchone('SELECT queue FROM guild_data WHERE guild_id = ?', (guild_id,))
+            if result and result[0]:
+                return result[0].split(",")
+            return []
         except Exception as e:
             print(f"Error fetching queue: {e}")
             return []
@@ -61,14 +180,108 @@ class DatabaseManager:
     async def set_queue(self, guild_id, queue):
         try:
             queue_str = ",".join(queue)
-            await self.db.execute('REPLACE INTO guild_data (guild_id, queue) VALUES (?, ?)', (guild_id, queue_str))
-            await self.db.commit()
+            await self.execute(
+                'INSERT INTO guild_data (guild_id, queue) VALUES (?, ?) '
+                'ON CONFLICT(guild_id) DO UPDATE SET queue = excluded.queue',
+                (guild_id, queue_str)
+            )
         except Exception as e:
             print(f"Error setting queue: {e}")
 
+    async def add_giveaway(self, message_id, channel_id, guild_id, prize, winners, role_id, ends_at):
+        try:
+            await self.execute(
+                'INSERT OR REPLACE INTO giveaways (message_id, channel_id, guild_id, prize, winners, role_id, ends_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (message_id, channel_id, guild_id, prize, winners, role_id, ends_at)
+            )
+        except Exception as e:
+            print(f"Error saving giveaway: {e}")
+
+    async def remove_giveaway(self, message_id):
+        try:
+            await self.execute('DELETE FROM giveaways WHERE message_id = ?', (message_id,))
+        except Exception as e:
+            print(f"Error removing giveaway: {e}")
+
+    async def get_giveaways(self):
+        try:
+            return await self.fetchall(
+                'SELECT message_id, channel_id, prize, winners, role_id, ends_at FROM giveaways ORDER BY ends_at'
+            )
+        except Exception as e:
+            print(f"Error fetching giveaways: {e}")
+            return []
+
+    async def add_reaction_role(self, message_id, emoji, guild_id, role_id):
+        try:
+            await self.execute(
+                'INSERT OR REPLACE INTO reaction_roles (message_id, emoji, guild_id, role_id) VALUES (?, ?, ?, ?)',
+                (message_id, emoji, guild_id, role_id)
+            )
+        except Exception as e:
+            print(f"Error saving reaction role: {e}")
+
+    async def get_reaction_role(self, message_id, emoji):
+        try:
+            result = await self.fetchone(
+                'SELECT role_id FROM reaction_roles WHERE message_id = ? AND emoji = ?', (message_id, emoji)
+            )
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error fetching reaction role: {e}")
+            return None
+
+    async def add_ticket(self, channel_id, guild_id, user_id):
+        try:
+            await self.execute(
+                'INSERT OR REPLACE INTO tickets (channel_id, guild_id, user_id) VALUES (?, ?, ?)',
+                (channel_id, guild_id, user_id)
+            )
+        except Exception as e:
+            print(f"Error saving ticket: {e}")
+
+    async def is_ticket(self, channel_id):
+        try:
+            return await self.fetchone('SELECT 1 FROM tickets WHERE channel_id = ?', (channel_id,)) is not None
+        except Exception as e:
+            print(f"Error fetching ticket: {e}")
+            return False
+
+    async def remove_ticket(self, channel_id):
+        try:
+            await self.execute('DELETE FROM tickets WHERE channel_id = ?', (channel_id,))
+        except Exception as e:
+            print(f"Error removing ticket: {e}")
+
+    async def add_temp_channel(self, channel_id, guild_id, owner_id):
+        try:
+            await self.execute(
+                'INSERT OR REPLACE INTO temp_voice_channels (channel_id, guild_id, owner_id) VALUES (?, ?, ?)',
+                (channel_id, guild_id, owner_id)
+            )
+        except Exception as e:
+            print(f"Error saving temporary channel: {e}")
+
+    async def get_temp_channels(self):
+        try:
+            return await self.fetchall('SELECT channel_id, owner_id FROM temp_voice_channels')
+        except Exception as e:
+            print(f"Error fetching temporary channels: {e}")
+            return []
+
+    async def remove_temp_channel(self, channel_id):
+        try:
+            await self.execute('DELETE FROM temp_voice_channels WHERE channel_id = ?', (channel_id,))
+        except Exception as e:
+            print(f"Error removing temporary channel: {e}")
+
 # Instantiate DatabaseManager
 db_manager = DatabaseManager()
 
 async def setup(bot):
     await db_manager.connect()
-    bot.add_cog(DatabaseManager())
+    bot.db = db_manager
+
+async def teardown(bot):
+    await db_manager.close()
@@ -0,0 +1,167 @@
+# utils/audio_cache.py
+import asyncio
+import hashlib
+import os
+import shlex
+from collections import OrderedDict
+from typing import Optional
+from utils.constants import FFMPEG_OPTS
+
+# EBU R128 loudness normalisation, then Opus at Discord's native 48 kHz stereo
+ENCODE_ARGS = [
+    "-vn", "-af", "loudnorm=I=-16:TP=-1.5:LRA=11",
+    "-c:a", "libopus", "-b:a", "128k", "-ar", "48000", "-ac", "2",
+    "-f", "opus",
+]
+
+
+class AudioCache:
+    """On-disk cache of loudness-normalised Opus files, indexed by track ID.
+
+    A track is encoded once it has been played `min_plays` times. Cached
+    files are evicted least-recently-used first once the directory grows
+    past `max_bytes`. Play counts are kept for at most `max_tracked`
+    uncached tracks, least-recently-played dropped first. Encodes run one
+    at a time on a single background worker.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, min_plays: int = 3,
+                 max_tracked: int = 1024, ffmpeg: str = "ffmpeg"):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.min_plays = min_plays
+        self.max_tracked = max_tracked
+        self.ffmpeg = ffmpeg
+        self.plays: OrderedDict[str, int] = OrderedDict()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._encoding: set[str] = set()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from AUDIO_CACHE_DIR, or return None if it is not set."""
+        directory = os.getenv("AUDIO_CACHE_DIR")
+        if not directory:
+            return None
+        max_mb = int(os.getenv("AUDIO_CACHE_MAX_MB", "512"))
+        min_plays = int(os.getenv("AUDIO_CACHE_MIN_PLAYS", "3"))
+        return cls(directory, max_mb * 1024 * 1024, min_plays)
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".opus"):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-5], stat.st_size))
+            elif name.endswith(".part"):
+                os.remove(path)
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+
+    @staticmethod
+    def key_for(track_id: str) -> str:
+        return hashlib.sha1(track_id.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.opus")
+
+    @property
+    def size(self) -> int:
+        return sum(self._entries.values())
+
+    def get(self, track_id: str):
+        """Return the cached file path for a track, or None on a miss."""
+        key = self.key_for(track_id)
+        if key not in self._entries:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        os.utime(path)
+        return path
+
+    def discard(self, track_id: str):
+        """Drop a cached track, e.g. one the player could not load."""
+        key = self.key_for(track_id)
+        self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def record_play(self, track_id: str, resolve):
+        """Count a play; start encoding in the background once the track is popular enough.
+
+        `resolve` is a blocking callable returning a stream URL for the track.
+        It only runs, in an executor, when the track is actually encoded.
+        """
+        key = self.key_for(track_id)
+        if key in self._entries or key in self._encoding:
+            return
+        self.plays[key] = self.plays.get(key, 0) + 1
+        self.plays.move_to_end(key)
+        if self.plays[key] >= self.min_plays:
+            del self.plays[key]
+            self._encoding.add(key)
+            self._queue.put_nowait((key, resolve))
+            if self._worker is None or self._worker.done():
+                self._worker = asyncio.create_task(self._run())
+        elif len(self.plays) > self.max_tracked:
+            self.plays.popitem(last=False)
+
+    async def _run(self):
+        while not self._queue.empty():
+            key, resolve = self._queue.get_nowait()
+            await self._encode(key, resolve)
+
+    def close(self):
+        """Stop the encode worker; queued tracks are forgotten."""
+        if self._worker:
+            self._worker.cancel()
+        while not self._queue.empty():
+            self._encoding.discard(self._queue.get_nowait()[0])
+
+    async def _encode(self, key: str, resolve):
+        path = self._path(key)
+        tmp = f"{path}.part"
+        try:
+            url = await asyncio.get_running_loop().run_in_executor(None, resolve)
+            proc = await asyncio.create_subprocess_exec(
+                self.ffmpeg, "-nostdin", "-loglevel", "error",
+                *shlex.split(FFMPEG_OPTS["before_options"]),
+                "-i", url, *ENCODE_ARGS, "-y", tmp,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                _, err = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                raise
+            if proc.returncode != 0:
+                print(f"Error caching track {key}: {err.decode(errors='ignore').strip()}")
+                return
+            os.replace(tmp, path)
+            self._entries[key] = os.path.getsize(path)
+            self._evict()
+        except Exception as e:
+            print(f"Error caching track {key}: {e}")
+        finally:
+            self._encoding.discard(key)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _evict(self):
+        total = self.size
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
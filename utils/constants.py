@@ -3,3 +3,6 @@ FFMPEG_OPTS = {
     "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
     "options": "-vn"
 }
+
+# Voice channels with this name spawn a temporary channel for whoever joins
+JOIN_TO_CREATE_NAME = "➕ Join to Create"
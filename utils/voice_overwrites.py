@@ -0,0 +1,134 @@
+# utils/voice_overwrites.py
+import asyncio
+import time
+
+
+class OverwriteCoalescer:
+    """Merges permission overwrite changes per channel over a short window.
+
+    Changes queued for the same channel within `delay` seconds are merged,
+    so only the last value queued for each permission is applied. Each
+    target whose overwrite actually changes is then sent with its own
+    `set_permissions` call, which leaves every other overwrite on the
+    channel untouched. Changes that match the current overwrite are dropped,
+    e.g. locking a channel that is already locked.
+    """
+
+    def __init__(self, delay: float = 0.5, sent_ttl: float = 5.0):
+        self.delay = delay
+        # how long our own writes take precedence over the cached channel,
+        # which only catches up once the CHANNEL_UPDATE event arrives
+        self.sent_ttl = sent_ttl
+        self.requests_sent = 0
+        self.changes_dropped = 0
+        self._pending: dict[int, dict] = {}
+        self._channels: dict[int, object] = {}
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        # channel id -> [lock, number of flushes holding or waiting on it]
+        self._locks: dict[int, list] = {}
+        self._sent: dict[tuple, tuple[dict, float]] = {}
+
+    def queue(self, channel, target, **perms) -> asyncio.Future:
+        """Queue overwrite changes for `target` on `channel`.
+
+        The returned future resolves to True if a request was sent, False if
+        the change was a no-op, or raises the error from the request.
+        """
+        targets = self._pending.setdefault(channel.id, {})
+        targets.setdefault(target, {}).update(perms)
+        self._channels[channel.id] = channel
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(channel.id, []).append(future)
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._flush_later(channel.id))
+        return future
+
+    async def _flush_later(self, channel_id: int):
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._tasks.pop(channel_id, None)
+        await self.flush(channel_id)
+
+    def _current(self, channel, target):
+        overwrite = channel.overwrites_for(target)
+        sent = self._sent.get((channel.id, target))
+        if sent and time.monotonic() - sent[1] < self.sent_ttl:
+            for name, value in sent[0].items():
+                setattr(overwrite, name, value)
+        return overwrite
+
+    def _remember(self, channel_id: int, target, changes: dict):
+        now = time.monotonic()
+        for key, (_, sent_at) in list(self._sent.items()):
+            if now - sent_at >= self.sent_ttl:
+                del self._sent[key]
+        previous = self._sent.get((channel_id, target), ({}, now))[0]
+        self._sent[(channel_id, target)] = ({**previous, **changes}, now)
+
+    async def _apply(self, channel, targets: dict) -> bool:
+        sent = False
+        for target, perms in targets.items():
+            overwrite = self._current(channel, target)
+            changes = {name: value for name, value in perms.items() if getattr(overwrite, name) != value}
+            self.changes_dropped += len(perms) - len(changes)
+            if not changes:
+                continue
+            for name, value in changes.items():
+                setattr(overwrite, name, value)
+            await channel.set_permissions(target, overwrite=overwrite)
+            self.requests_sent += 1
+            self._remember(channel.id, target, changes)
+            sent = True
+        return sent
+
+    async def flush(self, channel_id: int):
+        """Apply pending changes for one channel now. Returns True if a request was sent."""
+        entry = self._locks.setdefault(channel_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._flush(channel_id)
+        finally:
+            entry[1] -= 1
+            if not entry[1] and self._locks.get(channel_id) is entry:
+                del self._locks[channel_id]
+
+    async def _flush(self, channel_id: int):
+        targets = self._pending.pop(channel_id, None)
+        channel = self._channels.pop(channel_id, None)
+        waiters = self._waiters.pop(channel_id, [])
+        try:
+            sent = bool(targets and channel) and await self._apply(channel, targets)
+        except Exception as e:
+            if not waiters:
+                print(f"Error editing overwrites for channel {channel_id}: {e}")
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return False
+        for future in waiters:
+            if not future.done():
+                future.set_result(sent)
+        return sent
+
+    async def flush_all(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
+        for channel_id in list(self._pending):
+            await self.flush(channel_id)
+
+    def discard(self, channel_id: int):
+        """Forget pending changes for a channel that no longer exists."""
+        self._pending.pop(channel_id, None)
+        self._channels.pop(channel_id, None)
+        self._locks.pop(channel_id, None)
+        for future in self._waiters.pop(channel_id, []):
+            future.cancel()
+        for key in [key for key in self._sent if key[0] == channel_id]:
+            del self._sent[key]
+        task = self._tasks.pop(channel_id, None)
+        if task:
+            task.cancel()